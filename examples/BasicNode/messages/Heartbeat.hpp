@@ -4,6 +4,7 @@
 
 // -----------------------------------------------------------------------------
 // This file was generated by umsg-gen.
+// Fingerprint: 0xBD8BD5DF
 // Source: messages.umsg
 //
 // DO NOT EDIT THIS FILE DIRECTLY.
@@ -17,7 +18,7 @@ struct Heartbeat
     uint32_t uptime_ms;
 
     static const uint32_t kMsgHash = 0xF5BA0031u;
-    static const size_t kPayloadSize = sizeof(uint32_t);
+    static const size_t kPayloadSize = 4u;
 
     bool encode(umsg::ByteSpan& payload) const
     {
@@ -4,6 +4,7 @@
 
 // -----------------------------------------------------------------------------
 // This file was generated by umsg-gen.
+// Fingerprint: 0x4DAB5B84
 // Source: SetLed.umsg
 //
 // DO NOT EDIT THIS FILE DIRECTLY.
@@ -17,7 +18,7 @@ struct SetLed
     bool state;
 
     static const uint32_t kMsgHash = 0x18E29F44u;
-    static const size_t kPayloadSize = sizeof(bool);
+    static const size_t kPayloadSize = 1u;
 
     bool encode(umsg::ByteSpan& payload) const
     {
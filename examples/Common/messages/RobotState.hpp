@@ -4,6 +4,7 @@
 
 // -----------------------------------------------------------------------------
 // This file was generated by umsg-gen.
+// Fingerprint: 0x895DA6E5
 // Source: RobotState.umsg
 //
 // DO NOT EDIT THIS FILE DIRECTLY.
@@ -18,7 +19,7 @@ struct RobotState
     float battery_voltage;
 
     static const uint32_t kMsgHash = 0x6F95B45Au;
-    static const size_t kPayloadSize = sizeof(uint8_t) + sizeof(float);
+    static const size_t kPayloadSize = 5u;
 
     bool encode(umsg::ByteSpan& payload) const
     {
@@ -4,6 +4,7 @@
 
 // -----------------------------------------------------------------------------
 // This file was generated by umsg-gen.
+// Fingerprint: 0x4C524BE0
 // Source: SensorReading.umsg
 //
 // DO NOT EDIT THIS FILE DIRECTLY.
@@ -18,7 +19,7 @@ struct SensorReading
     float value;
 
     static const uint32_t kMsgHash = 0x4DF97BD2u;
-    static const size_t kPayloadSize = sizeof(uint32_t) + sizeof(float);
+    static const size_t kPayloadSize = 8u;
 
     bool encode(umsg::ByteSpan& payload) const
     {
@@ -0,0 +1,192 @@
+"""Tests for umsg_gen (stdlib unittest).
+
+Run from the repository root:
+  python3 -m unittest discover -s tools/umsg_gen
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import umsg_gen  # noqa: E402
+
+
+class ParseTest(unittest.TestCase):
+    # (schema text, field count, kMsgHash) as produced by the original generator.
+    # kMsgHash is a wire ID, so these values must never change.
+    CASES = [
+        ("package messages;\nstruct SetLed { bool state; };\n", 1, 0x18E29F44),
+        ("package /*x*/ foo;\nstruct S { uint8_t x; };", 1, 0xB4DCFBD8),
+        ("struct S { uint8_t a; // see /* old\n uint8_t b;\n // */\n};", 1, 0x4CFD54F1),
+        ("struct S { uint8_t a; /* // */ bool b; };", 2, 0x7B7296EA),
+    ]
+
+    def test_hash_and_fields_match_original_generator(self) -> None:
+        for text, n_fields, msg_hash in self.CASES:
+            with self.subTest(text=text):
+                msg = umsg_gen.parse_umsg(text)
+                self.assertEqual(len(msg.fields), n_fields)
+                self.assertEqual(msg.msg_hash, msg_hash)
+                self.assertEqual(msg.canonical_text, umsg_gen.canonicalize_for_hash(text))
+
+    def test_package_excluded_from_hash(self) -> None:
+        a = umsg_gen.parse_umsg("package a.b;\nstruct S { uint8_t x; double y[3]; };")
+        b = umsg_gen.parse_umsg("struct S {\n  uint8_t x;\n  double y[ 3 ];\n};\n")
+        self.assertEqual(a.package, "a.b")
+        self.assertIsNone(b.package)
+        self.assertEqual(a.msg_hash, b.msg_hash)
+        self.assertEqual(a.fields, b.fields)
+
+    def test_crlf_parses_like_lf(self) -> None:
+        lf = "package a;\nstruct S {\n  uint8_t x;\n  bool y[2];\n};\n"
+        self.assertEqual(umsg_gen.parse_umsg(lf.replace("\n", "\r\n")), umsg_gen.parse_umsg(lf))
+
+    def test_lenient_statements(self) -> None:
+        msg = umsg_gen.parse_umsg("struct A { ; uint8_t x;; bool y };")
+        self.assertEqual([f.name for f in msg.fields], ["x", "y"])
+
+    def test_errors(self) -> None:
+        bad = [
+            ("", "expected 'struct"),
+            ("struct A { };", "no fields"),
+            ("foo; struct A { uint8_t x; };", "unexpected content before struct"),
+            ("package 9a; struct A { uint8_t x; };", "unexpected content before struct"),
+            ("package; struct A { uint8_t x; };", "unexpected content before struct"),
+            ("struct A { uint8_t x; }", "expected ';' after closing"),
+            ("struct A { uint8_t x; }; junk", "unexpected trailing content"),
+            ("struct A { char x; };", "unsupported type 'char'"),
+            ("struct A { uint8_t x[0]; };", "array length"),
+            ("struct A { uint8_t x y; };", "invalid field declaration: 'uint8_t x y'"),
+            ("struct A { uint8_t x; ", "unterminated"),
+            ("struct A { uint8_t x; { }; };", "unexpected '{'"),
+        ]
+        for text, message in bad:
+            with self.subTest(text=text):
+                with self.assertRaises(umsg_gen.ParseError) as cm:
+                    umsg_gen.parse_umsg(text)
+                self.assertIn(message, str(cm.exception))
+
+
+class CliTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        self.out = os.path.join(self.tmp, "out")
+
+    def write_schema(self, name: str, text: str) -> str:
+        path = os.path.join(self.tmp, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def run_main(self, *argv: str) -> str:
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            self.assertEqual(umsg_gen.main(list(argv)), 0)
+        return stdout.getvalue()
+
+    def header_path(self, name: str) -> str:
+        return os.path.join(self.out, "demo", f"{name}.hpp")
+
+    def read(self, path: str) -> str:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def test_jobs_must_be_positive(self) -> None:
+        schema = self.write_schema("a.umsg", "struct A { uint8_t x; };")
+        for jobs in ("0", "-1", "x"):
+            with self.subTest(jobs=jobs):
+                with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit) as cm:
+                    umsg_gen.main([schema, "-o", self.out, "-j", jobs])
+                self.assertEqual(cm.exception.code, 2)
+
+    def test_parallel_stdout_keeps_input_order(self) -> None:
+        names = ["A", "B", "C", "D"]
+        paths = [self.write_schema(f"{n}.umsg", f"struct {n} {{ uint8_t x; }};") for n in names]
+        with mock.patch.object(umsg_gen, "_PARALLEL_MIN_INPUTS", 2):
+            out = self.run_main(*paths, "-o", self.out, "--stdout", "-j", "2")
+        structs = [line.split()[1] for line in out.splitlines() if line.startswith("struct ")]
+        self.assertEqual(structs, names)
+
+    def assert_not_regenerated(self) -> contextlib.AbstractContextManager:
+        return mock.patch.object(umsg_gen, "write_header", side_effect=AssertionError("regenerated"))
+
+    def test_noop_rebuild_leaves_header_alone(self) -> None:
+        schema = self.write_schema("S.umsg", "package demo;\nstruct S { uint8_t x; };")
+        self.run_main(schema, "-o", self.out)
+        self.assertIn("// Fingerprint: 0x", self.read(self.header_path("S")))
+        self.assertTrue(os.path.exists(os.path.join(self.out, umsg_gen._CACHE_FILE_NAME)))
+
+        with self.assert_not_regenerated():
+            self.run_main(schema, "-o", self.out)
+
+    def test_edited_header_is_regenerated(self) -> None:
+        schema = self.write_schema("S.umsg", "package demo;\nstruct S { uint8_t x; };")
+        self.run_main(schema, "-o", self.out)
+        header = self.header_path("S")
+        expected = self.read(header)
+
+        # The edit keeps the fingerprint line, so only the cache index can catch it.
+        with open(header, "a", encoding="utf-8") as f:
+            f.write("// local edit\n")
+        self.run_main(schema, "-o", self.out)
+        self.assertEqual(self.read(header), expected)
+
+    def test_stamped_fingerprint_used_without_index(self) -> None:
+        schema = self.write_schema("S.umsg", "package demo;\nstruct S { uint8_t x; };")
+        self.run_main(schema, "-o", self.out)
+        os.remove(os.path.join(self.out, umsg_gen._CACHE_FILE_NAME))
+
+        with self.assert_not_regenerated():
+            self.run_main(schema, "-o", self.out)
+        self.assertIn(os.path.join("demo", "S.hpp"), umsg_gen.load_cache(self.out))
+
+    def test_schema_change_is_regenerated(self) -> None:
+        schema = self.write_schema("S.umsg", "package demo;\nstruct S { uint8_t x; };")
+        self.run_main(schema, "-o", self.out)
+        self.write_schema("S.umsg", "package demo;\nstruct S { uint8_t x; bool y; };")
+        self.run_main(schema, "-o", self.out)
+        self.assertIn("bool y;", self.read(self.header_path("S")))
+
+
+    def test_header_mode_matches_plain_open(self) -> None:
+        schema = self.write_schema("S.umsg", "package demo;\nstruct S { uint8_t x; };")
+        self.run_main(schema, "-o", self.out)
+        reference = self.write_schema("reference.txt", "")
+        header = self.header_path("S")
+        self.assertEqual(os.stat(header).st_mode, os.stat(reference).st_mode)
+        # The temp file was renamed into place, not left behind.
+        self.assertEqual(os.listdir(os.path.dirname(header)), ["S.hpp"])
+
+    def test_streamed_header_matches_emit_header(self) -> None:
+        text = "package demo;\nstruct S { uint8_t x; double y[3]; };"
+        schema = self.write_schema("S.umsg", text)
+        self.run_main(schema, "-o", self.out)
+        expected = umsg_gen.emit_header(umsg_gen.parse_umsg(text), source_path=schema)
+        self.assertEqual(self.read(self.header_path("S")), expected)
+
+    def test_hash_option(self) -> None:
+        schema = self.write_schema("S.umsg", "struct S { uint8_t x; };")
+        msg = umsg_gen.parse_umsg("struct S { uint8_t x; };", "blake2s")
+        self.assertNotEqual(msg.msg_hash, umsg_gen.parse_umsg("struct S { uint8_t x; };").msg_hash)
+        out = self.run_main(schema, "-o", self.out, "--stdout", "--hash", "blake2s")
+        self.assertIn(f"kMsgHash = 0x{msg.msg_hash:08X}u;", out)
+
+    def test_payload_size(self) -> None:
+        schema = self.write_schema("S.umsg", "struct S { uint64_t t; double p[3]; bool ok; };")
+        self.assertIn("kPayloadSize = 33u;", self.run_main(schema, "-o", self.out, "--stdout"))
+        portable = self.run_main(schema, "-o", self.out, "--stdout", "--portable-sizeof")
+        self.assertIn("kPayloadSize = sizeof(uint64_t) + (sizeof(double) * 3u) + sizeof(bool);", portable)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -15,11 +15,15 @@ This emits: out_dir/<struct_name>.hpp
 from __future__ import annotations
 
 import argparse
+import contextlib
 import dataclasses
+import functools
+import hashlib
+import json
 import os
 import re
 import sys
-from typing import List, Optional, Sequence, Tuple
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
 
 @dataclasses.dataclass(frozen=True)
@@ -38,37 +42,98 @@ class Message:
     msg_hash: int
 
 
-# ---- hashing (design.md: FNV-1a 32-bit) ----
+# ---- hashing (design.md: FNV-1a 32-bit by default) ----
+
+_FNV1A_32_OFFSET = 2166136261
+_FNV1A_32_PRIME = 16777619
+
 
 def fnv1a_32(data: bytes) -> int:
-    h = 2166136261
+    # Deliberately pure Python: the generator is stdlib-only and runs as a plain
+    # script, and the hashed input is the canonical schema text (tens of bytes).
+    h = _FNV1A_32_OFFSET
+    prime = _FNV1A_32_PRIME  # local: LOAD_FAST instead of LOAD_GLOBAL per byte
+    mask = 0xFFFFFFFF
     for b in data:
-        h ^= b
-        h = (h * 16777619) & 0xFFFFFFFF
+        h = ((h ^ b) * prime) & mask
     return h
 
 
+def blake2s_32(data: bytes) -> int:
+    # C-implemented (hashlib); the 32-bit schema ID is the digest truncated to 4 bytes.
+    return int.from_bytes(hashlib.blake2s(data, digest_size=4).digest(), "big")
+
+
+# Schema hash algorithms selectable with --hash. Both ends of a link must use the
+# same one; FNV-1a stays the default so existing kMsgHash values do not change.
+SCHEMA_HASHES = {
+    "fnv1a": fnv1a_32,
+    "blake2s": blake2s_32,
+}
+
+
 # ---- canonicalization of .umsg source ----
 
-def strip_comments(text: str) -> str:
+_IDENT_RE = r"[A-Za-z_][A-Za-z0-9_]*"
+
+# All patterns are compiled once at import; the hot paths call the bound methods.
+_BLOCK_COMMENT_RE = re.compile(r"/\*.*?\*/", re.DOTALL)
+_LINE_COMMENT_RE = re.compile(r"//[^\n\r]*")
+_WS_RE = re.compile(r"[ \t\r\n]+")
+_STRUCT_HEADER_RE = re.compile(rf"\bstruct\s+({_IDENT_RE})\s*\{{")
+_PACKAGE_NAME_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_.]*")
+_TRAILING_SEMI_RE = re.compile(r"^\s*;")
+# One field statement: <type> <name> [ [N] ] ';'. The declaration is optional so
+# stray ';' are skipped, and the last statement may omit its ';'.
+_FIELD_STMT_RE = re.compile(
+    rf"\s*(?:({_IDENT_RE})\s+({_IDENT_RE})\s*(?:\[\s*(\d+)\s*\])?\s*)?(?:;|\Z)"
+)
+
+# What else is excluded from the schema hash once comments are gone: the optional
+# package directive and whitespace, in one scan.
+_PACKAGE_OR_WS_RE = re.compile(r"\bpackage\s+[A-Za-z_][A-Za-z0-9_.]*\s*;|[ \t\r\n]+")
+
+
+# Hot functions below bind compiled-pattern methods as keyword-only defaults
+# (`_sub=_WS_RE.sub`): a LOAD_FAST instead of a global plus attribute lookup.
+# They are not part of the call signature; never pass them.
+
+
+def strip_comments(
+    text: str,
+    *,
+    _block_sub=_BLOCK_COMMENT_RE.sub,
+    _line_sub=_LINE_COMMENT_RE.sub,
+) -> str:
     # Remove /* ... */ block comments
-    text = re.sub(r"/\*.*?\*/", "", text, flags=re.DOTALL)
+    text = _block_sub("", text)
     # Remove // ... to end-of-line (handles \n and \r\n)
-    text = re.sub(r"//[^\n\r]*", "", text)
-    return text
+    return _line_sub("", text)
 
 
 def remove_ascii_whitespace(text: str) -> str:
     # Remove space, tab, CR, LF
-    return re.sub(r"[ \t\r\n]+", "", text)
+    return _WS_RE.sub("", text)
+
+
+def _canonicalize_stripped(
+    src: str,
+    *,
+    _ws_sub=_WS_RE.sub,
+    _pkg_ws_sub=_PACKAGE_OR_WS_RE.sub,
+) -> str:
+    # The optional package directive, excluded from the hash, and whitespace are removed
+    # together. The package alternative still sees the original whitespace, so the
+    # pattern stays as simple as the multi-pass version.
+    # Most schemas have no package, so skip the alternation when the keyword is absent.
+    if "package" not in src:
+        return _ws_sub("", src)
+    return _pkg_ws_sub("", src)
 
 
 def canonicalize_for_hash(umsg_text: str) -> str:
-    text = strip_comments(umsg_text)
-    # Exclude optional package directive from schema hash.
-    # This is done before whitespace stripping so patterns are simple and robust.
-    text = re.sub(r"\bpackage\s+[A-Za-z_][A-Za-z0-9_.]*\s*;", "", text)
-    return remove_ascii_whitespace(text)
+    # Comments go first (block before line; that order is part of the schema hash).
+    return _canonicalize_stripped(strip_comments(umsg_text))
 
 
 # ---- parsing (restricted grammar) ----
@@ -87,8 +152,6 @@ _ALLOWED_TYPES = {
     "double",
 }
 
-_IDENT_RE = r"[A-Za-z_][A-Za-z0-9_]*"
-
 
 class ParseError(Exception):
     pass
@@ -100,54 +163,101 @@ def _expect_no_extra_tokens(src: str) -> None:
     _ = src
 
 
-def parse_umsg(text: str) -> Message:
+def _parse_fields(
+    body: str,
+    *,
+    _finditer=_FIELD_STMT_RE.finditer,
+    _allowed=_ALLOWED_TYPES,
+    _field=Field,
+) -> List[Field]:
+    fields: List[Field] = []
+
+    # Scan statements in one pass; every match must start where the previous one ended.
+    pos = 0
+    for fm in _finditer(body):
+        if fm.start() != pos:
+            stmt_end = body.find(";", pos)
+            stmt = body[pos : stmt_end if stmt_end >= 0 else len(body)].strip()
+            raise ParseError(f"invalid field declaration: '{stmt}'")
+        pos = fm.end()
+
+        type_name, name, arr = fm.group(1, 2, 3)
+        if type_name is None:
+            continue
+
+        if type_name not in _allowed:
+            raise ParseError(f"unsupported type '{type_name}'")
+
+        array_len: Optional[int] = None
+        if arr is not None:
+            array_len = int(arr)
+            if array_len <= 0:
+                raise ParseError("array length must be > 0")
+
+        fields.append(_field(type_name=type_name, name=name, array_len=array_len))
+
+    return fields
+
+
+def parse_umsg(
+    text: str,
+    hash_name: str = "fnv1a",
+    *,
+    _strip=strip_comments,
+    _canon=_canonicalize_stripped,
+    _struct=_STRUCT_HEADER_RE.search,
+    _trail=_TRAILING_SEMI_RE.match,
+    _fields=_parse_fields,
+) -> Message:
     """Parse a .umsg file containing exactly one struct definition."""
 
-    # Keep original text for hashing.
-    canonical = canonicalize_for_hash(text)
-    msg_hash = fnv1a_32(canonical.encode("utf-8"))
+    # Comments are stripped once; the result feeds both the hash and the parser.
+    src = _strip(text)
 
-    # Parse from comment-stripped text (but keep whitespace for easier regex boundaries).
-    src = strip_comments(text)
+    # Same canonical text as canonicalize_for_hash(text).
+    canonical = _canon(src)
+    msg_hash = SCHEMA_HASHES[hash_name](canonical.encode("utf-8"))
 
+    # Parse from comment-stripped text (but keep whitespace for easier regex boundaries).
     # Find the struct header.
-    m = re.search(rf"\bstruct\s+({_IDENT_RE})\s*\{{", src)
+    m = _struct(src)
     if not m:
         raise ParseError("expected 'struct <name> { ... };'")
 
     # Optional: package directive in the preamble. Allowed forms:
     #   package foo;
     #   package foo.bar;
-    preamble = src[: m.start()]
-    pm = re.fullmatch(r"\s*(?:package\s+([A-Za-z_][A-Za-z0-9_.]*)\s*;\s*)?", preamble)
-    if not pm:
-        raise ParseError("unexpected content before struct (only optional 'package <name>;' allowed)")
-    package = pm.group(1)
+    preamble = src[: m.start()].strip()
+    package: Optional[str] = None
+    if preamble:
+        name = preamble[7:-1].strip()
+        if not (
+            preamble.startswith("package")
+            and preamble[7:8].isspace()
+            and preamble.endswith(";")
+            and _PACKAGE_NAME_RE.fullmatch(name)
+        ):
+            raise ParseError("unexpected content before struct (only optional 'package <name>;' allowed)")
+        package = name
 
     struct_name = m.group(1)
 
-    # Extract body by matching braces (simple, single struct).
+    # Extract body (simple, single struct).
     brace_start = src.find("{", m.end() - 1)
     if brace_start < 0:
         raise ParseError("expected '{' after struct name")
 
-    depth = 0
-    end = None
-    for i in range(brace_start, len(src)):
-        if src[i] == "{":
-            depth += 1
-        elif src[i] == "}":
-            depth -= 1
-            if depth == 0:
-                end = i
-                break
-    if end is None:
+    # The grammar has no nested braces, so the body ends at the first '}'.
+    end = src.find("}", brace_start + 1)
+    if end < 0:
         raise ParseError("unterminated '{' in struct")
+    if src.find("{", brace_start + 1, end) >= 0:
+        raise ParseError("unexpected '{' in struct body")
 
     body = src[brace_start + 1 : end]
     rest = src[end + 1 :]
 
-    sm = re.match(r"^\s*;", rest)
+    sm = _trail(rest)
     if not sm:
         raise ParseError("expected ';' after closing '}'")
 
@@ -155,34 +265,7 @@ def parse_umsg(text: str) -> Message:
     if trailing.strip():
         raise ParseError("unexpected trailing content after struct definition")
 
-    fields: List[Field] = []
-
-    # Split into statements by ';' and parse each.
-    for stmt in body.split(";"):
-        stmt = stmt.strip()
-        if not stmt:
-            continue
-
-        # Match: <type> <name> [ [N] ]
-        fm = re.fullmatch(
-            rf"({_IDENT_RE})\s+({_IDENT_RE})\s*(?:\[\s*(\d+)\s*\])?\s*",
-            stmt,
-        )
-        if not fm:
-            raise ParseError(f"invalid field declaration: '{stmt}'")
-
-        type_name, name, arr = fm.group(1), fm.group(2), fm.group(3)
-        if type_name not in _ALLOWED_TYPES:
-            raise ParseError(f"unsupported type '{type_name}'")
-
-        array_len: Optional[int] = None
-        if arr is not None:
-            array_len = int(arr)
-            if array_len <= 0:
-                raise ParseError("array length must be > 0")
-
-        fields.append(Field(type_name=type_name, name=name, array_len=array_len))
-
+    fields = _fields(body)
     if not fields:
         raise ParseError("struct has no fields")
 
@@ -197,15 +280,42 @@ def parse_umsg(text: str) -> Message:
     )
 
 
+@functools.lru_cache(maxsize=1024)
+def _parse_cached(text: str, hash_name: str = "fnv1a") -> Message:
+    # Message is frozen, so repeated inputs in one run can share the parsed result.
+    return parse_umsg(text, hash_name)
+
+
 # ---- code generation ----
 
 
+# Encoded width of each type on the wire (see marshalling.hpp; bool is one byte).
+_TYPE_SIZE = {
+    "uint8_t": 1,
+    "int8_t": 1,
+    "uint16_t": 2,
+    "int16_t": 2,
+    "uint32_t": 4,
+    "int32_t": 4,
+    "uint64_t": 8,
+    "int64_t": 8,
+    "bool": 1,
+    "float": 4,
+    "double": 8,
+}
+
+
 def cpp_type_size_expr(type_name: str) -> str:
     # Use sizeof(T) for portability; the generator emits C++11 and includes <stdint.h>.
     return f"sizeof({type_name})"
 
 
-def cpp_payload_size_expr(fields: Sequence[Field]) -> str:
+def cpp_payload_size_expr(fields: Sequence[Field], portable_sizeof: bool = False) -> str:
+    if not portable_sizeof:
+        # Every supported type has a fixed wire width, so fold the size here.
+        total = sum(_TYPE_SIZE[f.type_name] * (f.array_len or 1) for f in fields)
+        return f"{total}u"
+
     parts: List[str] = []
     for f in fields:
         if f.array_len is None:
@@ -215,110 +325,328 @@ def cpp_payload_size_expr(fields: Sequence[Field]) -> str:
     return " + ".join(parts) if parts else "0u"
 
 
-def emit_header(msg: Message, source_path: Optional[str] = None, header_guard: Optional[str] = None) -> str:
+_HEADER_PRELUDE = (
+    "#pragma once\n"
+    "#include <stddef.h>\n"
+    "#include <stdint.h>\n"
+    "\n"
+)
+
+_GENERATED_COMMENT_HEAD = (
+    "// -----------------------------------------------------------------------------\n"
+    "// This file was generated by umsg-gen.\n"
+)
+
+_GENERATED_COMMENT_FINGERPRINT = "// Fingerprint: 0x{:08X}\n"
+
+_GENERATED_COMMENT_SOURCE = "// Source: {}\n"
+
+_GENERATED_COMMENT_TAIL = (
+    "//\n"
+    "// DO NOT EDIT THIS FILE DIRECTLY.\n"
+    "// Edit the corresponding .umsg schema and re-run umsg-gen instead.\n"
+    "// -----------------------------------------------------------------------------\n"
+    "\n"
+    "#include <umsg/marshalling.hpp>\n"
+    "\n"
+)
+
+# encode/decode use capacity-in/length-out for encode.
+_ENCODE_HEAD = (
+    "    bool encode(umsg::ByteSpan& payload) const\n"
+    "    {\n"
+    "        if (!payload.data) return false;\n"
+    "        const size_t cap = payload.length;\n"
+    "        umsg::Writer w(payload);\n"
+)
+
+_ENCODE_TAIL = (
+    "        if (w.bytesWritten() > cap) return false;\n"
+    "        payload.length = w.bytesWritten();\n"
+    "        return true;\n"
+    "    }\n"
+    "\n"
+)
+
+_DECODE_HEAD = (
+    "    bool decode(umsg::ByteSpan payload)\n"
+    "    {\n"
+    "        if (payload.length < kPayloadSize) return false;\n"
+    "        umsg::Reader r(payload);\n"
+)
+
+_DECODE_TAIL = (
+    "        return true;\n"
+    "    }\n"
+    "};\n"
+)
+
+
+# Bump whenever the emitted layout changes so stale headers are regenerated.
+_HEADER_FORMAT_VERSION = 2
+
+# The fingerprint line sits in the generated comment, well inside this many leading bytes.
+_FINGERPRINT_PEEK_BYTES = 1024
+_FINGERPRINT_RE = re.compile(r"^// Fingerprint: 0x([0-9A-F]{8})$", re.MULTILINE)
+
+
+def header_fingerprint(
+    msg: Message,
+    source_path: Optional[str] = None,
+    header_guard: Optional[str] = None,
+    portable_sizeof: bool = False,
+) -> int:
+    """Identify everything emit_header() output depends on, without emitting it."""
+    # NUL-separated key parts fed to hashlib (C), so fingerprinting stays cheap next to
+    # codegen even for large schemas. Not a wire ID; only compared against itself.
+    h = hashlib.blake2s(str(_HEADER_FORMAT_VERSION).encode("utf-8"), digest_size=4)
+    for part in (
+        f"{msg.msg_hash:08X}",
+        msg.canonical_text,
+        os.path.basename(source_path) if source_path else "",
+        header_guard or "",
+        "portable-sizeof" if portable_sizeof else "",
+    ):
+        h.update(b"\0")
+        h.update(part.encode("utf-8"))
+    return int.from_bytes(h.digest(), "big")
+
+
+def iter_header(
+    msg: Message,
+    source_path: Optional[str] = None,
+    header_guard: Optional[str] = None,
+    portable_sizeof: bool = False,
+    fingerprint: Optional[int] = None,
+) -> Iterator[str]:
+    """Yield the generated header as newline-terminated fragments, in order.
+
+    Pass `fingerprint` when the caller already computed header_fingerprint() for
+    the same arguments, so it is not computed twice.
+    """
     # Prefer #pragma once in this repo.
-    payload_size_expr = cpp_payload_size_expr(msg.fields)
+    payload_size_expr = cpp_payload_size_expr(msg.fields, portable_sizeof)
+
+    if header_guard:
+        # Not used by default, but available if you prefer guards.
+        yield f"#ifndef {header_guard}\n#define {header_guard}\n"
 
-    struct_lines: List[str] = [f"struct {msg.struct_name}", "{"
-    ]
+    yield _HEADER_PRELUDE
+    yield _GENERATED_COMMENT_HEAD
+    if fingerprint is None:
+        fingerprint = header_fingerprint(msg, source_path, header_guard, portable_sizeof)
+    yield _GENERATED_COMMENT_FINGERPRINT.format(fingerprint)
+    if source_path:
+        yield _GENERATED_COMMENT_SOURCE.format(os.path.basename(source_path))
+    yield _GENERATED_COMMENT_TAIL
+
+    # Per-field lines are yielded as they are formatted, one pass over the fields per
+    # section, so no section is ever buffered whole.
+    yield f"struct {msg.struct_name}\n{{\n"
     for f in msg.fields:
         if f.array_len is None:
-            struct_lines.append(f"    {f.type_name} {f.name};")
+            yield f"    {f.type_name} {f.name};\n"
         else:
-            struct_lines.append(f"    {f.type_name} {f.name}[{f.array_len}];")
-    struct_lines.append("")
-    struct_lines.append(f"    static const uint32_t kMsgHash = 0x{msg.msg_hash:08X}u;")
-    struct_lines.append(f"    static const size_t kPayloadSize = {payload_size_expr};")
-    struct_lines.append("")
-
-    # encode/decode use capacity-in/length-out for encode.
-    struct_lines.append("    bool encode(umsg::ByteSpan& payload) const")
-    struct_lines.append("    {")
-    struct_lines.append("        if (!payload.data) return false;")
-    struct_lines.append("        const size_t cap = payload.length;")
-    struct_lines.append("        umsg::Writer w(payload);")
+            yield f"    {f.type_name} {f.name}[{f.array_len}];\n"
+    yield "\n"
+    yield f"    static const uint32_t kMsgHash = 0x{msg.msg_hash:08X}u;\n"
+    yield f"    static const size_t kPayloadSize = {payload_size_expr};\n"
+    yield "\n"
 
+    yield _ENCODE_HEAD
     for f in msg.fields:
         if f.array_len is None:
-            struct_lines.append(f"        if (!w.write({f.name})) return false;")
+            yield f"        if (!w.write({f.name})) return false;\n"
         else:
-            struct_lines.append(f"        if (!w.writeArray({f.name}, {f.array_len}u)) return false;")
-
-    struct_lines.append("        if (w.bytesWritten() > cap) return false;")
-    struct_lines.append("        payload.length = w.bytesWritten();")
-    struct_lines.append("        return true;")
-    struct_lines.append("    }")
-    struct_lines.append("")
-
-    struct_lines.append("    bool decode(umsg::ByteSpan payload)")
-    struct_lines.append("    {")
-    struct_lines.append("        if (payload.length < kPayloadSize) return false;")
-    struct_lines.append("        umsg::Reader r(payload);")
+            yield f"        if (!w.writeArray({f.name}, {f.array_len}u)) return false;\n"
+    yield _ENCODE_TAIL
 
+    yield _DECODE_HEAD
     for f in msg.fields:
         if f.array_len is None:
-            struct_lines.append(f"        if (!r.read({f.name})) return false;")
+            yield f"        if (!r.read({f.name})) return false;\n"
         else:
-            struct_lines.append(f"        if (!r.readArray({f.name}, {f.array_len}u)) return false;")
+            yield f"        if (!r.readArray({f.name}, {f.array_len}u)) return false;\n"
+    yield _DECODE_TAIL
 
-    struct_lines.append("        return true;")
-    struct_lines.append("    }")
+    if header_guard:
+        yield f"\n#endif // {header_guard}\n"
 
-    struct_lines.append("};")
 
-    source_note = ""
-    if source_path:
-        source_note = os.path.basename(source_path)
-
-    generated_comment = (
-        "// -----------------------------------------------------------------------------\n"
-        "// This file was generated by umsg-gen.\n"
-        + (f"// Source: {source_note}\n" if source_note else "")
-        + "//\n"
-          "// DO NOT EDIT THIS FILE DIRECTLY.\n"
-          "// Edit the corresponding .umsg schema and re-run umsg-gen instead.\n"
-          "// -----------------------------------------------------------------------------\n"
-    )
+def emit_header(
+    msg: Message,
+    source_path: Optional[str] = None,
+    header_guard: Optional[str] = None,
+    portable_sizeof: bool = False,
+    fingerprint: Optional[int] = None,
+) -> str:
+    """Generate the C++ header for msg as one string (see iter_header)."""
+    return "".join(iter_header(msg, source_path, header_guard, portable_sizeof, fingerprint))
 
-    header = "\n".join(
-        [
-            "#pragma once",
-            "#include <stddef.h>",
-            "#include <stdint.h>",
-            "",
-            generated_comment.rstrip("\n"),
-            "",
-            "#include <umsg/marshalling.hpp>",
-            "",
-            *struct_lines,
-            "",
-        ]
-    )
 
-    if header_guard:
-        # Not used by default, but available if you prefer guards.
-        header = (
-            f"#ifndef {header_guard}\n#define {header_guard}\n" + header + f"\n#endif // {header_guard}\n"
-        )
+# ---- CLI ----
+
 
-    return header
+def read_fingerprint(path: str) -> Optional[int]:
+    """Return the fingerprint stamped into an existing generated header, if any."""
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            head = f.read(_FINGERPRINT_PEEK_BYTES)
+    except FileNotFoundError:
+        return None
+    m = _FINGERPRINT_RE.search(head)
+    return int(m.group(1), 16) if m else None
 
 
-# ---- CLI ----
+# O_EXCL so a temp name is never shared; O_BINARY keeps Windows from translating newlines
+# twice (the text wrapper on top already does).
+_TEMP_OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+
+
+def _create_temp_beside(path: str) -> Tuple[int, str]:
+    # Like tempfile.mkstemp, but created 0o666 & ~umask (what a plain open() gives),
+    # rather than 0600 followed by a chmod that would need to read the process umask.
+    prefix = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.")
+    while True:
+        tmp_path = f"{prefix}{os.urandom(6).hex()}.tmp"
+        try:
+            return os.open(tmp_path, _TEMP_OPEN_FLAGS, 0o666), tmp_path
+        except FileExistsError:
+            continue
 
 
-def write_if_changed(path: str, content: str) -> None:
+def write_header(
+    path: str,
+    msg: Message,
+    source_path: Optional[str] = None,
+    portable_sizeof: bool = False,
+    fingerprint: Optional[int] = None,
+) -> None:
+    """Stream the generated header into a temp file next to `path`, then rename it into place."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    # The rename makes the write atomic: readers see the old header or the new one, never
+    # a partial file. iter_header() is lazy, so memory use does not grow with the struct.
+    fd, tmp_path = _create_temp_beside(path)
+    try:
+        with open(fd, "w", encoding="utf-8") as f:
+            fragments = iter_header(
+                msg,
+                source_path=source_path,
+                portable_sizeof=portable_sizeof,
+                fingerprint=fingerprint,
+            )
+            for fragment in fragments:
+                f.write(fragment)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_path)
+        raise
+
+
+def header_out_path(msg: Message, out_dir: str) -> str:
+    if msg.package:
+        package_dir = msg.package.replace(".", os.sep)
+        return os.path.join(out_dir, package_dir, f"{msg.struct_name}.hpp")
+    return os.path.join(out_dir, f"{msg.struct_name}.hpp")
+
+
+# Per-output-directory index of what was last generated: {relative header path:
+# [fingerprint, st_mtime_ns, st_size]}. A hit needs only a stat() of the header.
+_CACHE_FILE_NAME = ".umsg_gen_cache.json"
+
+
+def load_cache(out_dir: str) -> Dict[str, List[int]]:
+    try:
+        with open(os.path.join(out_dir, _CACHE_FILE_NAME), "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def save_cache(out_dir: str, cache: Dict[str, List[int]]) -> None:
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, _CACHE_FILE_NAME), "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+
+def _stat_entry(path: str) -> Optional[List[int]]:
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            old = f.read()
-        if old == content:
-            return
+        st = os.stat(path)
     except FileNotFoundError:
-        pass
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+@dataclasses.dataclass(frozen=True)
+class GenResult:
+    header: Optional[str] = None  # only set for --stdout
+    cache_key: Optional[str] = None
+    cache_entry: Optional[List[int]] = None
+
+
+def process_one(
+    in_path: str,
+    out_dir: str,
+    to_stdout: bool = False,
+    portable_sizeof: bool = False,
+    cache: Optional[Dict[str, List[int]]] = None,
+    hash_name: str = "fnv1a",
+) -> GenResult:
+    """Read, parse and generate one input (or return the header text when to_stdout is set)."""
+    # Read raw bytes and decode once: skips the text layer's incremental decoder and
+    # newline translation (the parser and canonicalizer treat '\r' as whitespace).
+    with open(in_path, "rb") as f:
+        text = f.read().decode("utf-8")
+
+    msg = _parse_cached(text, hash_name)
+
+    if to_stdout:
+        return GenResult(header=emit_header(msg, source_path=in_path, portable_sizeof=portable_sizeof))
+
+    out_path = header_out_path(msg, out_dir)
+    cache_key = os.path.relpath(out_path, out_dir)
+    fingerprint = header_fingerprint(msg, source_path=in_path, portable_sizeof=portable_sizeof)
+
+    st = _stat_entry(out_path)
+    entry = cache.get(cache_key) if cache else None
+    if st is not None:
+        if entry is not None:
+            # No-op rebuild: the header on disk is exactly what the cache index recorded.
+            # Any other stat means the file was touched outside the generator: regenerate.
+            if entry == [fingerprint, *st]:
+                return GenResult(cache_key=cache_key, cache_entry=entry)
+        elif read_fingerprint(out_path) == fingerprint:
+            # No index entry yet: trust the fingerprint stamped in the header.
+            return GenResult(cache_key=cache_key, cache_entry=[fingerprint, *st])
+
+    write_header(
+        out_path,
+        msg,
+        source_path=in_path,
+        portable_sizeof=portable_sizeof,
+        fingerprint=fingerprint,
+    )
+    st = _stat_entry(out_path)
+    return GenResult(cache_key=cache_key, cache_entry=[fingerprint, *st] if st else None)
+
 
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(content)
+def _positive_int(value: str) -> int:
+    try:
+        n = int(value)
+    except ValueError:
+        n = 0
+    if n <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value!r}")
+    return n
+
+
+# Below this many inputs, process pool startup costs more than it saves: a worker
+# takes ~2 ms to start, while one input takes ~0.1 ms to generate (less on no-op rebuilds).
+_PARALLEL_MIN_INPUTS = 200
 
 
 def main(argv: Sequence[str]) -> int:
@@ -326,28 +654,62 @@ def main(argv: Sequence[str]) -> int:
     ap.add_argument("input", nargs="+", help=".umsg file(s)")
     ap.add_argument("-o", "--out", required=True, help="output directory")
     ap.add_argument("--stdout", action="store_true", help="write generated header(s) to stdout")
+    ap.add_argument(
+        "-j",
+        "--jobs",
+        type=_positive_int,
+        default=None,
+        help="number of worker processes (default: CPU count; 1 disables parallelism)",
+    )
+    ap.add_argument(
+        "--portable-sizeof",
+        action="store_true",
+        help="emit kPayloadSize as a sizeof(...) expression instead of a folded constant",
+    )
+    ap.add_argument(
+        "--hash",
+        choices=sorted(SCHEMA_HASHES),
+        default="fnv1a",
+        help="schema hash used for kMsgHash (default: fnv1a; all peers must agree)",
+    )
 
     args = ap.parse_args(list(argv))
 
-    out_dir = args.out
-
-    for in_path in args.input:
-        with open(in_path, "r", encoding="utf-8") as f:
-            text = f.read()
-
-        msg = parse_umsg(text)
-        header = emit_header(msg, source_path=in_path)
-
-        if args.stdout:
-            sys.stdout.write(header)
-            continue
+    inputs = args.input
+    workers = args.jobs or os.cpu_count() or 1
+    cache = {} if args.stdout else load_cache(args.out)
+    job = functools.partial(
+        process_one,
+        out_dir=args.out,
+        to_stdout=args.stdout,
+        portable_sizeof=args.portable_sizeof,
+        cache=cache,
+        hash_name=args.hash,
+    )
 
-        if msg.package:
-            package_dir = msg.package.replace(".", os.sep)
-            out_path = os.path.join(out_dir, package_dir, f"{msg.struct_name}.hpp")
-        else:
-            out_path = os.path.join(out_dir, f"{msg.struct_name}.hpp")
-        write_if_changed(out_path, header)
+    new_cache = dict(cache)
+
+    def collect(result: GenResult) -> None:
+        if result.header is not None:
+            sys.stdout.write(result.header)
+        if result.cache_key is not None and result.cache_entry is not None:
+            new_cache[result.cache_key] = result.cache_entry
+
+    # Inputs are independent; fan out across processes. map() keeps input order,
+    # so --stdout output is identical to a serial run.
+    if workers <= 1 or len(inputs) < _PARALLEL_MIN_INPUTS:
+        for result in map(job, inputs):
+            collect(result)
+    else:
+        import concurrent.futures
+
+        chunksize = max(1, len(inputs) // (workers * 4))
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as ex:
+            for result in ex.map(job, inputs, chunksize=chunksize):
+                collect(result)
+
+    if new_cache != cache:
+        save_cache(args.out, new_cache)
 
     return 0
 